@@ -2,6 +2,9 @@
 Generate a "P2" Penrose tiling - an aperiodic tiling composed
 of "kite" and "dart" shapes.
 """
+import cmath
+import functools
+import itertools
 import math
 import argparse
 
@@ -16,41 +19,160 @@ KITE = [(72, PHI), (72, 1), (144, 1), (72, PHI)]
 DART = [(72, PHI), (36, 1), (216, 1), (36, PHI)]
 
 
-class Vec2:
-    """A 2d vector, or point on a 2d plane"""
+class RotationTable(dict):
+    """
+    Maps a heading (in degrees) to the unit complex number pointing that way.
+    Headings in a kite/dart tiling are always multiples of 36 degrees, so
+    those are precomputed; anything else is computed on first use.
+    """
+
+    def __missing__(self, angle):
+        rot = self[angle] = cmath.rect(1, math.radians(angle))
+        return rot
+
+
+ROT = RotationTable((h, cmath.rect(1, math.radians(h))) for h in range(0, 360, 36))
+
+
+class OutlineTable(dict):
+    """
+    Maps a starting heading to the offsets (complex numbers, at scale 1)
+    from each point of a shape to the next. Like ROT, the multiples of
+    36 degrees are precomputed and other headings are filled in on demand.
+    """
+
+    def __init__(self, shape):
+        dict.__init__(self)
+        self.shape = shape
+        for h in range(0, 360, 36):
+            self[h] = self.offsets(h)
+        # centroid of the shape at location 0, heading 0, scale 1
+        pt, pts = 0j, [0j]
+        for offset in self[0]:
+            pt = pt + offset
+            pts.append(pt)
+        self.centroid = polygon_centroid(pts)
+        # every point of the shape is within this distance of its location
+        self.radius = max(abs(pt) for pt in pts)
+
+    def __missing__(self, heading):
+        offsets = self[heading] = self.offsets(heading)
+        return offsets
+
+    def offsets(self, heading):
+        res = []
+        for (angle, distance) in self.shape:
+            heading = (heading + (180 - angle)) % 360
+            res.append(distance * ROT[heading])
+        return tuple(res)
+
+
+# OutlineTable for each shape, keyed by id(shape).
+OUTLINES = {}
+
+
+def outline_table(shape):
+    table = OUTLINES.get(id(shape))
+    if table is None:
+        table = OUTLINES[id(shape)] = OutlineTable(shape)
+    return table
+
+
+def polygon_centroid(points):
+    """
+    Calculate the centroid of a polygon given as a list of complex numbers.
+    (Generic algorithm for any polygon)
+    """
+    n = len(points)
+    area = 0
+    cx = 0
+    cy = 0
+
+    for i in range(n):
+        j = (i + 1) % n
+        pi, pj = points[i], points[j]
+        cross_product = pi.real * pj.imag - pj.real * pi.imag
+        area += cross_product
+        cx += (pi.real + pj.real) * cross_product
+        cy += (pi.imag + pj.imag) * cross_product
+
+    area /= 2
+    cx /= (6 * area)
+    cy /= (6 * area)
+
+    return complex(cx, cy)
+
+
+class Vec2(complex):
+    """
+    A 2d vector, or point on a 2d plane.
+    Stored as the complex number x + yj, so arithmetic happens in C.
+    """
+    __slots__ = ()  # x and y live in the complex value itself
+
+    def __new__(cls, x=0.0, y=0.0):
+        """Vec2(x, y), or Vec2(z) to wrap a complex number z"""
+        if isinstance(x, complex):
+            return complex.__new__(cls, x.real, x.imag + y)
+        return complex.__new__(cls, x, y)
 
-    def __init__(self, x=0.0, y=0.0):
-        self.x = float(x)
-        self.y = float(y)
+    @property
+    def x(self):
+        return self.real
+
+    @property
+    def y(self):
+        return self.imag
 
     def __repr__(self):
         """convert to string, for (e.g.) print()"""
-        return "(%0.3f, %0.3f)" % (self.x, self.y)
+        return "(%0.3f, %0.3f)" % (self.real, self.imag)
 
     def __sub__(self, other):
         """element-wise subtraction of two vectors"""
-        return Vec2(self.x - other.x, self.y - other.y)
+        return Vec2(complex.__sub__(self, other))
 
     def __add__(self, other):
         """element-wise addition of two vectors"""
-        return Vec2(self.x + other.x, self.y + other.y)
+        return Vec2(complex.__add__(self, other))
+
+    def __radd__(self, other):
+        return Vec2(complex.__radd__(self, other))
+
+    def __rsub__(self, other):
+        return Vec2(complex.__rsub__(self, other))
+
+    def __neg__(self):
+        return Vec2(-self.real, -self.imag)
 
     def __mul__(self, other):
         """scale this vector by an amount"""
-        if isinstance(other, float):
-            return Vec2(self.x * other, self.y * other)
-        elif isinstance(other, int):
-            return self * float(other)
+        if isinstance(other, (float, int)):
+            return Vec2(complex.__mul__(self, float(other)))
         else:
             raise NotImplementedError()
 
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        """scale this vector by 1/amount"""
+        if isinstance(other, (float, int)):
+            return Vec2(complex.__truediv__(self, float(other)))
+        else:
+            raise NotImplementedError()
+
+    __div__ = __truediv__
+
     def __hash__(self):
         # convert to string so the hash isn't effected by small floating point errors
         return hash(str(self))
 
     def __eq__(self, other):
         epsilon = 1e-6
-        return abs(self.x - other.x) < epsilon and abs(self.y - other.y) < epsilon
+        return abs(self.real - other.real) < epsilon and abs(self.imag - other.imag) < epsilon
+
+    def __ne__(self, other):
+        return not self == other
 
     def offset(self, angle, distance):
         """
@@ -58,27 +180,26 @@ class Vec2:
         The angle is in degrees, with 0 pointing to
         the right, and 90 pointing upward
         """
-        rad = math.radians(angle)
-        x = self.x + distance * math.cos(rad)
-        y = self.y + distance * math.sin(rad)
-        return Vec2(x, y)
+        # ROT has the multiples of 36 degrees precomputed, so wrap the angle
+        # into [0, 360) to hit those entries instead of caching aliases.
+        return Vec2(complex.__add__(self, distance * ROT[angle % 360]))
 
     def dot(self, other):
         """return the 'dot product' with other vector"""
-        return self.x * other.x + self.y * other.y
+        return self.real * other.real + self.imag * other.imag
 
     def dist(self, other):
         """returns a scalar representing the distance to the other point"""
-        return math.sqrt((other.x - self.x) ** 2 + (other.y - self.y) ** 2)
+        return abs(complex.__sub__(self, other))
 
     def length(self):
         """magnitude of the vector / the distance from the origin"""
-        return self.dist(Vec2.ZERO)
+        return abs(self)
 
     def norm(self):
         """normalize this vector to length=1"""
         length = self.length()
-        return Vec2(self.x / length, self.y / length) if length > 0 else Vec2.ZERO
+        return Vec2(complex.__truediv__(self, length)) if length > 0 else Vec2.ZERO
 
 
 Vec2.ZERO = Vec2(0, 0)
@@ -89,6 +210,7 @@ class Tile:
     Represents an arbitrary tile (polygon) anchored at a
     given location and "pointing" in a given direction.
     """
+    __slots__ = ('shape', 'location', 'heading', 'scale', '_pts', '_cent')
 
     def __init__(self, shape, location, heading, scale):
         """
@@ -103,29 +225,38 @@ class Tile:
         self.location = location
         self.heading = heading
         self.scale = scale
+        self._pts = None
+        self._cent = None
+
+    def key(self):
+        """hashable identity of the tile (see tile_key)"""
+        return tile_key(self.shape, self.location, self.heading, self.scale)
 
     def __hash__(self):
-        return hash((id(self.shape), self.location, self.heading, self.scale))
+        return hash(self.key())
 
     def __eq__(self, other):
-        for slot in ['shape', 'location', 'heading', 'scale']:
-            if getattr(self, slot) != getattr(other, slot):
-                return False
-        return True
+        return self.key() == other.key()
+
+    def __ne__(self, other):
+        return not self == other
 
-    def translate(self, dxy):
-        return Tile(self.shape, self.location + dxy, self.heading, self.scale)
+    def outline(self):
+        """offsets from each point of the tile to the next, at scale 1"""
+        return outline_table(self.shape)[self.heading % 360]
 
     def points(self):
         """generate the (scaled and rotated) points of the tile"""
-        heading = self.heading
-        point = self.location
-        yield point
-        for (angle, distance) in self.shape:
-            heading = (heading + (180 - angle)) % 360
-            other = point.offset(heading, distance * self.scale)
-            point = other
-            yield point
+        if self._pts is None:
+            # tiles never change, so the outline is only computed once
+            point = self.location
+            pt, scale = complex(point), self.scale
+            pts = [point]
+            for offset in self.outline():
+                pt = pt + offset * scale
+                pts.append(Vec2(pt))
+            self._pts = pts
+        return iter(self._pts)
 
     def lines(self):
         """generate the lines of this shape as (x1,y1,x2,y2) tuples"""
@@ -139,26 +270,13 @@ class Tile:
     def centroid(self):
         """
         Calculate the centroid of the tile.
-        (Generic algorithm for any polygon)
+        (The shape's centroid is found once, at heading 0 and scale 1,
+        then rotated, scaled and moved into place.)
         """
-        points = list(self.points())
-        n = len(points)
-        area = 0
-        cx = 0
-        cy = 0
-
-        for i in range(n):
-            j = (i + 1) % n
-            cross_product = points[i].x * points[j].y - points[j].x * points[i].y
-            area += cross_product
-            cx += (points[i].x + points[j].x) * cross_product
-            cy += (points[i].y + points[j].y) * cross_product
-
-        area /= 2
-        cx /= (6 * area)
-        cy /= (6 * area)
-
-        return Vec2(cx, cy)
+        if self._cent is None:
+            c = outline_table(self.shape).centroid
+            self._cent = Vec2(complex(self.location) + c * self.scale * ROT[self.heading % 360])
+        return self._cent
 
     def scale_by(self, factor):
         """
@@ -175,36 +293,33 @@ class Tile:
         To generate a tiling, we can replace each kite with two smaller kites and two
         darts, and each dart with two smaller darts and a kite.
         """
+        k = shape_index(self.shape)
+        if k is None:
+            raise NotImplementedError("Can only inflate kites and darts")
+        rules = INFLATE_RULES[id(SHAPES[k])]
         p = list(self.points())
         h = self.heading
         s = self.scale / PHI
-
-        def aa(a0, a1):
-            return (a0 + a1) % 360  # add two angles
-
-        def an(n):
-            return (self.heading + sum([a for (a, _) in self.shape[:n]])) % 360  # (angle of point n)
-
-        if self.shape == KITE:
-            res = [dart(p[0], aa(h, -36), s),
-                   dart(p[0], aa(h, +36), s),
-                   kite(p[1], aa(an(1), +36), s),
-                   kite(p[3], aa(an(3), -36), s)]
-        elif self.shape == DART:
-            res = [kite(p[0], h, s), dart(p[1], aa(an(1), 72), s), dart(p[3], aa(an(3), -108), s)]
-        else:
-            raise NotImplementedError("Can only inflate kites and darts")
-        return res
+        return [Tile(shape, p[i], (h + dh) % 360, s) for (shape, i, dh) in rules]
 
     def svg(self):
         """
         Generate an SVG representation of the tile.
         """
-        p = ' '.join(str(p)[1:-1] for p in self.points())
-        # c = 'kite' if self.shape == KITE else 'dart'
-        s = 'fill:none;stroke:#0000ff;stroke-width:0.01;stroke-linecap:round;'
-        s += 'stroke-dasharray:none;stroke-opacity:1;-inkscape-stroke:hairline'
-        return '<polygon style="%s" points="%s"/>' % (s, p)
+        return next(svg_polygons([self]))
+
+
+# Tiles whose positions and scales agree to within 1/QUANTUM are the same tile.
+QUANTUM = 1e6
+
+
+def tile_key(shape, location, heading, scale):
+    """
+    Quantize a tile's parameters into a tuple of whole numbers, so that tiles
+    reached from different parents compare equal despite rounding errors.
+    """
+    return (id(shape), round(location.real * QUANTUM), round(location.imag * QUANTUM),
+            round(heading), round(scale * QUANTUM))
 
 
 def dart(p, h, s):
@@ -215,63 +330,415 @@ def kite(p, h, s):
     return Tile(KITE, p, heading=h, scale=s)
 
 
-# five kites coming together at a point make a "sun", five kites a "star"
-SUN = set([kite(Vec2.ZERO, h=72 * i, s=150) for i in range(5)])
-STAR = set([dart(Vec2.ZERO, h=72 * i, s=150) for i in range(5)])
+def corner(shape, n):
+    """sum of the first `n` corner angles of a shape (relative heading of point n)"""
+    return sum(a for (a, _) in shape[:n])
+
+
+# Each rule places a child tile: (child shape, index of the parent's point
+# it's anchored to, child heading relative to the parent's heading).
+INFLATE_RULES = {
+    id(KITE): [(DART, 0, -36), (DART, 0, +36),
+               (KITE, 1, corner(KITE, 1) + 36), (KITE, 3, corner(KITE, 3) - 36)],
+    id(DART): [(KITE, 0, 0),
+               (DART, 1, corner(DART, 1) + 72), (DART, 3, corner(DART, 3) - 108)],
+}
+
+
+# Shapes that can be inflated as rows. Rows (see inflate_rows) name
+# their shape by its index in this list.
+SHAPES = [KITE, DART]
+SHAPE_INDEX = dict((id(shape), k) for (k, shape) in enumerate(SHAPES))
+
+
+def shape_index(shape):
+    """
+    index of a shape in SHAPES (or None). Usually the shape *is* KITE or
+    DART, but an equal copy such as list(KITE) is matched by value.
+    """
+    k = SHAPE_INDEX.get(id(shape))
+    if k is None:
+        k = next((k for (k, s) in enumerate(SHAPES) if s == shape), None)
+    return k
+
+# Below this many rows, inflate_generation() doesn't bother with worker processes.
+PARALLEL_MIN_TILES = 4096
+
+# Rows store headings as a number of 36 degree steps, from 0 to STEPS - 1,
+# so the kernels turn with small int arithmetic and index plain lists.
+STEP = 36
+STEPS = 360 // STEP
+STEP_ROT = [ROT[STEP * i] for i in range(STEPS)]
+
+
+def step_outlines(shape):
+    """outline offsets of a shape, indexed by heading step"""
+    table = outline_table(shape)
+    return [table[STEP * i] for i in range(STEPS)]
+
+
+def step_turns(shape):
+    """heading changes of INFLATE_RULES[id(shape)], in steps"""
+    return [dh // STEP for (_, _, dh) in INFLATE_RULES[id(shape)]]
+
+
+def inflate_kites(rows, out):
+    """
+    inflate_rows() for rows that are all kites, appending the children to `out`.
+    Straight-line version of INFLATE_RULES[id(KITE)]: two darts at point 0,
+    then kites at points 1 and 3.
+    """
+    add = out.append
+    outlines = step_outlines(KITE)
+    k, d = SHAPE_INDEX[id(KITE)], SHAPE_INDEX[id(DART)]
+    (dh0, dh1, dh2, dh3) = step_turns(KITE)
+    for (_, x, y, h, s) in rows:
+        o = outlines[h]
+        p1 = complex(x, y) + o[0] * s
+        p3 = p1 + o[1] * s + o[2] * s
+        s = s / PHI
+        add((d, x, y, (h + dh0) % STEPS, s))
+        add((d, x, y, (h + dh1) % STEPS, s))
+        add((k, p1.real, p1.imag, (h + dh2) % STEPS, s))
+        add((k, p3.real, p3.imag, (h + dh3) % STEPS, s))
+
+
+def inflate_darts(rows, out):
+    """
+    inflate_rows() for rows that are all darts, appending the children to `out`.
+    Straight-line version of INFLATE_RULES[id(DART)]: a kite at point 0,
+    then darts at points 1 and 3.
+    """
+    add = out.append
+    outlines = step_outlines(DART)
+    k, d = SHAPE_INDEX[id(KITE)], SHAPE_INDEX[id(DART)]
+    (dh0, dh1, dh2) = step_turns(DART)
+    for (_, x, y, h, s) in rows:
+        o = outlines[h]
+        p1 = complex(x, y) + o[0] * s
+        p3 = p1 + o[1] * s + o[2] * s
+        s = s / PHI
+        add((k, x, y, (h + dh0) % STEPS, s))
+        add((d, p1.real, p1.imag, (h + dh1) % STEPS, s))
+        add((d, p3.real, p3.imag, (h + dh2) % STEPS, s))
+
+
+def inflate_rows(rows):
+    """
+    Inflate tiles given as plain (shape index, x, y, heading step, scale) tuples,
+    returning the children as rows in the same format (duplicates included).
+    The rows are split by shape and each group goes through its own kernel.
+    """
+    k, d = SHAPE_INDEX[id(KITE)], SHAPE_INDEX[id(DART)]
+    res = []
+    inflate_kites([row for row in rows if row[0] == k], res)
+    inflate_darts([row for row in rows if row[0] == d], res)
+    return res
+
+
+def unique_rows(rows):
+    """
+    Drop rows that describe the same tile.
+    The key is built inline (this loop sees every child of every generation)
+    and quantizes like tile_key(), except that the heading is the row's
+    exact step rather than round(degrees). The two keys aren't meant to
+    match: rows and Tiles are never deduped against each other.
+    """
+    res = {}
+    q = QUANTUM
+    for row in rows:
+        (k, x, y, h, s) = row
+        key = (k, round(x * q), round(y * q), h, round(s * q))
+        if key not in res:
+            res[key] = row
+    return list(res.values())
+
+
+# iterate() inflates this many levels at a time using precomputed patches.
+PATCH_DEPTH = 2
+
+# patch() results, keyed by (shape index, depth)
+PATCHES = {}
+
+
+def patch(k, depth):
+    """
+    The tiles produced by inflating SHAPES[k] `depth` times, starting from
+    location 0, heading 0 and scale 1, as (shape index, location, heading
+    step, scale) tuples. Every tile of that shape inflates to a rotated, scaled
+    and moved copy of this patch.
+    """
+    res = PATCHES.get((k, depth))
+    if res is None:
+        rows = [(k, 0.0, 0.0, 0, 1.0)]
+        for i in range(depth):
+            rows = unique_rows(inflate_rows(rows))
+        res = PATCHES[(k, depth)] = [(ck, complex(x, y), h, s) for (ck, x, y, h, s) in rows]
+    return res
+
+
+def inflate_rows_deep(rows, depth):
+    """
+    inflate_rows() applied `depth` times in one step, by laying a copy of
+    the shape's patch() over each row. Like inflate_rows(), the result
+    includes duplicates. This is the worker for a parallel
+    inflate_generation(): tuples pickle far faster than Tiles.
+    """
+    if depth == 1:
+        return inflate_rows(rows)
+    res = []
+    add = res.append
+    patches = [patch(k, depth) for k in range(len(SHAPES))]
+    for (k, x, y, h, s) in rows:
+        origin = complex(x, y)
+        rot = STEP_ROT[h] * s
+        for (ck, loc, ch, cs) in patches[k]:
+            p = origin + loc * rot
+            add((ck, p.real, p.imag, (h + ch) % STEPS, s * cs))
+    return res
+
+
+def tile_rows(tiles):
+    """
+    convert Tiles into (shape index, x, y, heading step, scale) rows.
+    Tiles facing between two steps can't be rows, so this returns a pair:
+    (rows, list of those off-step tiles). See inflate_tiles.
+    """
+    rows, off_step = [], []
+    for tile in tiles:
+        k = shape_index(tile.shape)
+        if k is None:
+            raise NotImplementedError("Can only inflate kites and darts")
+        step, rem = divmod(tile.heading % 360, STEP)
+        if rem:
+            off_step.append(tile)
+        else:
+            rows.append((k, tile.location.real, tile.location.imag, int(step), tile.scale))
+    return rows, off_step
+
+
+def row_tiles(rows):
+    """convert (shape index, x, y, heading step, scale) rows back into Tiles"""
+    return [Tile(SHAPES[k], Vec2(x, y), STEP * h, s) for (k, x, y, h, s) in rows]
+
+
+def translate_tiles(tiles, dxy):
+    """move a list of tiles by the vector `dxy`"""
+    dxy = complex(dxy)
+    return [Tile(t.shape, Vec2(complex(t.location) + dxy), t.heading, t.scale) for t in tiles]
+
+
+def ring_rows(shape, x, y, scale):
+    """rows for five tiles of one shape meeting at (x, y), 72 degrees apart"""
+    k = SHAPE_INDEX[id(shape)]
+    return [(k, x, y, (72 // STEP) * i, scale) for i in range(5)]
+
+
+# five kites coming together at a point make a "sun", five darts a "star"
+SUN = set(row_tiles(ring_rows(KITE, 0.0, 0.0, 150)))
+STAR = set(row_tiles(ring_rows(DART, 0.0, 0.0, 150)))
 
 
-def inflate(tiles):
+def inflate_generation(rows, pool=None, jobs=1, depth=1):
+    """
+    inflate() for rows: returns the unique tiles `depth` levels below the
+    given rows. If `pool` (a concurrent.futures executor with `jobs`
+    workers) is given, large generations are split into one chunk per job.
+    """
+    if pool is None or jobs < 2 or len(rows) < PARALLEL_MIN_TILES:
+        return unique_rows(inflate_rows_deep(rows, depth))
+    size = -(-len(rows) // jobs)
+    chunks = [rows[i:i + size] for i in range(0, len(rows), size)]
+    res = []
+    for children in pool.map(functools.partial(inflate_rows_deep, depth=depth), chunks):
+        res.extend(children)
+    return unique_rows(res)
+
+
+def inflate(tiles, pool=None, jobs=1):
     """
     Perform the "inflate" operation on a set of tiles.
-    This operation replaces each tile with a set of smaller tiles.
+    This operation replaces each tile with a set of smaller tiles,
+    returned as a list with no duplicates.
+
+    If `pool` (a concurrent.futures executor with `jobs` workers) is given,
+    large sets of tiles are inflated in parallel.
 
     (In the literature, this is followed by scaling the whole drawing
     by PHI, but we ignore this since we're dealing with SVG).
     """
-    res = set()
+    rows, off_step = tile_rows(tiles)
+    return row_tiles(inflate_generation(rows, pool, jobs)) + inflate_tiles(off_step)
+
+
+def inflate_tiles(tiles):
+    """
+    inflate() for tiles that aren't facing a multiple of STEP degrees,
+    using Tile.inflate and tile_key. Their children are off-step too, so
+    they never overlap tiles inflated as rows.
+    """
+    res = {}
     for tile in tiles:
         for child in tile.inflate():
-            res.add(child)
-    return res
+            key = child.key()
+            if key not in res:
+                res[key] = child
+    return list(res.values())
+
+
+# How far a tile of SHAPES[k] (and its descendants) can reach from its
+# location, at scale 1: the shape's radius plus a PHI margin for children
+# that stick out past their parent.
+REACH = [outline_table(shape).radius + PHI for shape in SHAPES]
+
+
+def reaches(bbox, k, x, y, s):
+    """
+    True if a SHAPES[k] tile at (x, y) with scale `s` (or its descendants)
+    could reach the (x0, y0, x1, y1) box. The tile is treated as a square
+    around its location, REACH[k] * s from the center to each side.
+    """
+    x0, y0, x1, y1 = bbox
+    r = REACH[k] * s
+    return x + r >= x0 and x - r <= x1 and y + r >= y0 and y - r <= y1
+
+
+def cull_rows(rows, bbox):
+    """keep only the rows whose tiles could reach the box (see reaches)"""
+    return [row for row in rows if reaches(bbox, row[0], row[1], row[2], row[4])]
+
 
+def cull_tiles(tiles, bbox):
+    """cull_rows() for Tiles"""
+    return [tile for tile in tiles
+            if reaches(bbox, shape_index(tile.shape), tile.location.real, tile.location.imag, tile.scale)]
 
-def iterate(initial_tiles, iters):
+
+def iterate_rows(rows, iters, jobs=1, bbox=None):
+    """
+    iterate() for rows: inflate `iters` times and return the final rows.
+    Works PATCH_DEPTH levels at a time, then single levels for the rest.
+    """
+    steps = [PATCH_DEPTH] * (iters // PATCH_DEPTH) + [1] * (iters % PATCH_DEPTH)
+    pool = None
+    if jobs > 1 and iters > 0:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(jobs)
+    try:
+        for depth in steps:
+            rows = inflate_generation(rows, pool, jobs, depth)
+            if bbox is not None:
+                rows = cull_rows(rows, bbox)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return rows
+
+
+def iterate(initial_tiles, iters, jobs=1, bbox=None):
     """
     run the `inflate()` operation `iters` times.
     `initial_tiles` should be a list of tiles like SUN or STAR
     (or make your own)
+    `jobs` > 1 inflates the larger generations across that many processes.
+    `bbox` = (x0, y0, x1, y1) drops tiles that can't end up inside that
+    box after each step, so offscreen areas aren't inflated further.
+
+    The intermediate generations are kept as plain rows (see inflate_rows),
+    so Tile objects are only built for the final result. Seeds that don't
+    face a multiple of STEP degrees take the slower inflate_tiles() path.
     """
-    tiles = initial_tiles
-    for i in range(iters):
-        tiles = inflate(tiles)
-    return tiles
+    if iters < 1:
+        return list(initial_tiles)
+    rows, off_step = tile_rows(initial_tiles)
+    rows = iterate_rows(rows, iters, jobs, bbox)
+    for i in range(iters if off_step else 0):
+        off_step = inflate_tiles(off_step)
+        if bbox is not None:
+            off_step = cull_tiles(off_step, bbox)
+    return row_tiles(rows) + off_step
+
 
+POLYGON_STYLE = ('fill:none;stroke:#0000ff;stroke-width:0.01;stroke-linecap:round;'
+                 'stroke-dasharray:none;stroke-opacity:1;-inkscape-stroke:hairline')
 
-def build_svg(tiles):
-    buf = []
-    w = buf.append
-    w('<svg version="1.1" width="2000" height="1200" xmlns="http://www.w3.org/2000/svg">')
+
+def polygon_template(n):
+    """format string for an SVG polygon with `n` points, taking 2*n coordinates"""
+    return '<polygon style="%s" points="%s"/>' % (POLYGON_STYLE, ' '.join(['%0.3f, %0.3f'] * n))
+
+
+def svg_polygons(tiles):
+    """
+    Generate the SVG <polygon> element for each tile.
+    Each one is a single % operation over the tile's flattened coordinates.
+    """
+    templates = {}
     for tile in tiles:
-        w(tile.svg())
-    w('</svg>')
-    return '\n'.join(buf)
+        coords = tuple([c for p in tile.points() for c in (p.real, p.imag)])
+        n = len(coords)
+        template = templates.get(n)
+        if template is None:
+            template = templates[n] = polygon_template(n // 2)
+        yield template % coords
 
 
-def main(seed, iters):
-    tiles = STAR if seed == "star" else SUN
-    tiles = [t.translate(Vec2(800, 500)) for t in tiles]
-    tiles = iterate(tiles, iters)
-    svg = build_svg(tiles)
+def svg_rows(rows):
+    """
+    svg_polygons() for (shape index, x, y, heading step, scale) rows.
+    The points come straight from the outline tables, so no Tiles or
+    Vec2s are built just to be printed.
+    """
+    outlines = [step_outlines(shape) for shape in SHAPES]
+    templates = [polygon_template(len(shape) + 1) for shape in SHAPES]
+    for (k, x, y, h, s) in rows:
+        coords = [x, y]
+        p = complex(x, y)
+        for offset in outlines[k][h]:
+            p = p + offset * s
+            coords += (p.real, p.imag)
+        yield templates[k] % tuple(coords)
+
+
+SVG_HEADER = b'<svg version="1.1" width="2000" height="1200" xmlns="http://www.w3.org/2000/svg">\n'
+SVG_FOOTER = b'</svg>\n'
+
+# write_svg() encodes and writes this many polygons at a time
+SVG_BATCH = 1024
+
+
+def write_svg(rows, out):
+    """
+    stream an SVG drawing of the rows (see svg_rows) to the binary file object `out`.
+    The markup is pure ASCII, so batches of polygons are joined and encoded
+    in one go rather than passing every line through a text codec.
+    """
+    out.write(SVG_HEADER)
+    polygons = svg_rows(rows)
+    while True:
+        batch = list(itertools.islice(polygons, SVG_BATCH))
+        if not batch:
+            break
+        batch.append('')
+        out.write('\n'.join(batch).encode('ascii'))
+    out.write(SVG_FOOTER)
+
+
+def main(seed, iters, jobs):
+    rows = ring_rows(DART if seed == "star" else KITE, 800.0, 500.0, 150)
+    rows = iterate_rows(rows, iters, jobs, bbox=(0, 0, 2000, 1200))
     path = "tiling-%s-%d.svg" % (seed, iters)
-    with open(path,  "w") as out:
-        out.write(svg)
-    print("wrote %s tiles to %s" % (len(tiles), path))
+    with open(path, "wb", buffering=4 << 20) as out:
+        write_svg(rows, out)
+    print("wrote %s tiles to %s" % (len(rows), path))
 
 
 def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument("--seed", default="sun", choices=["star", "sun"])
     parser.add_argument("--iters", default=4, type=int)
+    parser.add_argument("--jobs", default=1, type=int,
+                        help="worker processes to use for large inflations")
     return vars(parser.parse_args())
 
 